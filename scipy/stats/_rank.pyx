@@ -8,6 +8,8 @@ This module provides the following functions:
     tiecorrect
         Tie correction factor for the Mann-Whitney U test (stats.mannwhitnyu)
         and the Kruskal-Wallis H test (stats.kruskal).
+    _kendall_dis
+        Number of discordant pairs, used by stats.kendalltau.
 
 """
 
@@ -56,9 +58,9 @@ cdef np.ndarray[np.float64_t, ndim=1] _rankdata_fused(np.ndarray[array_data_type
     ranks = _np.empty((n,))
 
     if tie_method == METHOD_ORDINAL:
-        order = _np.argsort(b, kind="mergesort").astype(_np.intp)
+        order = _np.argsort(b, kind="mergesort")
     else:
-        order = _np.argsort(b).astype(_np.intp)
+        order = _np.argsort(b)
 
     with nogil:
         if tie_method == METHOD_ORDINAL:
@@ -188,8 +190,6 @@ def rankdata(a, method='average'):
     return ranks
 
 
-@cython.boundscheck(False)
-@cython.cdivision(True)
 def tiecorrect(rankvals):
     """
     tiecorrect(rankvals)
@@ -231,38 +231,50 @@ def tiecorrect(rankvals):
     0.9833333333333333
 
     """
-    cdef np.ndarray[np.float64_t, ndim=1] ranks
-    cdef unsigned int i, inext, n, nties, T
-    cdef np.ndarray[np.intp_t, ndim=1] order
-    cdef np.ndarray[np.float64_t, ndim=1] sorted_
-    cdef double factor
-
-    ranks = _np.asarray(rankvals).astype(_np.float64)
-
-    n = ranks.size
+    arr = _np.sort(_np.ravel(rankvals))
+    n = arr.size
     if n < 2:
         return 1.0
 
-    order = _np.argsort(ranks).astype(_np.intp)
-    sorted_ = _np.empty((n,))
+    # The lengths of the runs of equal values in the sorted ranks are the
+    # sizes of the tie groups.  They are accumulated as floats, because the
+    # cubes overflow a 32-bit integer for moderately large samples.
+    idx = _np.flatnonzero(_np.concatenate(([True], arr[1:] != arr[:-1],
+                                           [True])))
+    cnt = _np.diff(idx).astype(_np.float64)
+
+    return 1.0 - (cnt**3 - cnt).sum() / (float(n)**3 - n)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _kendall_dis(np.ndarray[np.intp_t, ndim=1] y, np.intp_t m):
+    """
+    _kendall_dis(y, m)
+
+    Count the pairs ``i < j`` with ``y[i] > y[j]``, where the values of `y`
+    are integers in ``[0, m)``.  For `y` ordered by the other variable this
+    is the number of discordant pairs (the swaps a bubble sort of `y` would
+    need).  A binary indexed tree over the values seen so far gives the
+    count in O(n log(m)) time.
+    """
+    cdef np.ndarray[np.intp_t, ndim=1] tree = _np.zeros(m + 1, dtype=_np.intp)
+    cdef np.intp_t i, j, seen, n = y.shape[0]
+    cdef np.int64_t dis = 0
 
     with nogil:
         for i in xrange(n):
-            sorted_[i] = ranks[order[i]]
-
-        T = 0
-        i = 0
-        while i < n - 1:
-            inext = i + 1
-            if sorted_[i] == sorted_[inext]:
-                nties = 1
-                while i < n - 1 and sorted_[i] == sorted_[inext]:
-                    nties += 1
-                    i += 1
-                    inext += 1
-                T = T + nties**3 - nties
-            i = inext
-
-        factor = 1.0 - T / float(n**3 - n)
-
-    return factor
+            # number of earlier values less than or equal to y[i]
+            seen = 0
+            j = y[i] + 1
+            while j > 0:
+                seen += tree[j]
+                j -= j & -j
+            dis += i - seen
+
+            j = y[i] + 1
+            while j <= m:
+                tree[j] += 1
+                j += j & -j
+
+    return dis
@@ -69,8 +69,14 @@ def linregress(x, y=None):
     xmean = np.mean(x, None)
     ymean = np.mean(y, None)
 
-    # average sum of squares:
-    ssxm, ssxym, ssyxm, ssym = np.cov(x, y, bias=1).flat
+    # average sum of squares; np.cov(x, y, bias=1) would stack x and y into
+    # a new array and compute both means again, so form the three distinct
+    # entries with inner products of the deviations instead
+    xm = x - xmean
+    ym = y - ymean
+    ssxm = np.dot(xm, xm) / n
+    ssxym = np.dot(xm, ym) / n
+    ssym = np.dot(ym, ym) / n
     r_num = ssxym
     r_den = np.sqrt(ssxm * ssym)
     if r_den == 0.0:
@@ -184,13 +190,10 @@ def theilslopes(y, x=None, alpha=0.95):
         if len(x) != len(y):
             raise ValueError("Incompatible lengths ! (%s<>%s)" % (len(y), len(x)))
 
-    # Compute sorted slopes only when deltax > 0
+    # Compute slopes only when deltax > 0
     deltax = x[:, np.newaxis] - x
     deltay = y[:, np.newaxis] - y
     slopes = deltay[deltax > 0] / deltax[deltax > 0]
-    slopes.sort()
-    medslope = np.median(slopes)
-    medinter = np.median(y) - medslope * np.median(x)
     # Now compute confidence intervals
     if alpha > 0.5:
         alpha = 1. - alpha
@@ -209,6 +212,17 @@ def theilslopes(y, x=None, alpha=0.95):
     sigma = np.sqrt(sigsq)
     Ru = min(int(np.round((nt - z*sigma)/2.)), len(slopes)-1)
     Rl = max(int(np.round((nt + z*sigma)/2.)) - 1, 0)
+
+    # Only the median and the confidence limits are needed from the sorted
+    # slopes, so a partial sort is enough.  ndarray.partition only exists in
+    # numpy 1.8.0 and higher, fall back to a full sort for older versions.
+    mid = [(nt - 1) // 2, nt // 2]
+    try:
+        slopes.partition(np.unique([Rl, Ru] + mid))
+    except AttributeError:
+        slopes.sort()
+    medslope = 0.5 * (slopes[mid[0]] + slopes[mid[1]])
+    medinter = np.median(y) - medslope * np.median(x)
     delta = slopes[[Rl, Ru]]
     return medslope, medinter, delta[0], delta[1]
 
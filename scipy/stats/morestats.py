@@ -1903,7 +1903,10 @@ def levene(*args, **kwds):
     # compute denom_variance
     dvar = 0.0
     for i in range(k):
-        dvar += np.sum((Zij[i] - Zbari[i])**2, axis=0)
+        # Zij is not used again, so center it in place and take the sum
+        # of squares as an inner product
+        Zij[i] -= Zbari[i]
+        dvar += np.dot(Zij[i], Zij[i])
 
     denom = (k - 1.0) * dvar
 
@@ -2320,11 +2323,13 @@ def wilcoxon(x, y=None, zero_method="wilcox", correction=False):
     if count < 10:
         warnings.warn("Warning: sample size too small for normal approximation.")
     r = stats.rankdata(abs(d))
-    r_plus = np.sum((d > 0) * r, axis=0)
-    r_minus = np.sum((d < 0) * r, axis=0)
+    # sum the ranks selected by each sign directly instead of multiplying
+    # all ranks by a 0/1 mask
+    r_plus = r[d > 0].sum()
+    r_minus = r[d < 0].sum()
 
     if zero_method == "zsplit":
-        r_zero = np.sum((d == 0) * r, axis=0)
+        r_zero = r[d == 0].sum()
         r_plus += r_zero / 2.
         r_minus += r_zero / 2.
 
@@ -48,6 +48,7 @@ from collections import namedtuple
 from . import distributions
 import scipy.special as special
 from . import futil
+from ._rank import rankdata as stats_rankdata
 from ._stats_mstats_common import (
         linregress as stats_linregress,
         theilslopes as stats_theilslopes
@@ -235,18 +236,17 @@ def rankdata(data, axis=None, use_missing=False):
     def _rank1d(data, use_missing=False):
         n = data.count()
         rk = np.empty(data.size, dtype=float)
-        idx = data.argsort()
-        rk[idx[:n]] = np.arange(1,n+1)
+        # rank the valid data with the compiled `stats.rankdata`, which
+        # averages the ranks of ties in the same pass, instead of fixing up
+        # each group of repeated values separately
+        mask = ma.getmaskarray(data)
+        rk[~mask] = stats_rankdata(data.compressed())
 
         if use_missing:
-            rk[idx[n:]] = (n+1)/2.
+            rk[mask] = (n+1)/2.
         else:
-            rk[idx[n:]] = 0
+            rk[mask] = 0
 
-        repeats = find_repeats(data.copy())
-        for r in repeats[0]:
-            condition = (data == r).filled(False)
-            rk[condition] = rk[condition].mean()
         return rk
 
     data = ma.array(data, copy=False)
@@ -589,6 +589,8 @@ def kendalltau_seasonal(x):
     denom_tot = ma.sqrt(1.*n_tot*(n_tot-1)*(n_tot*(n_tot-1)-corr_ties))/2.
 
     R = rankdata(x, axis=0, use_missing=True)
+    # all the column cross-products of the ranks in one matrix product
+    RR = np.dot(R.T, R)
     K = ma.empty((m,m), dtype=int)
     covmat = ma.empty((m,m), dtype=float)
     denom_szn = ma.empty(m, dtype=float)
@@ -599,7 +601,7 @@ def kendalltau_seasonal(x):
         for k in range(j,m,1):
             K[j,k] = np.sum(msign((x[i:,j]-x[i,j])*(x[i:,k]-x[i,k])).sum()
                                for i in range(n))
-            covmat[j,k] = (K[j,k] + 4*(R[:,j]*R[:,k]).sum() -
+            covmat[j,k] = (K[j,k] + 4*RR[j,k] -
                            n*(n_p[j]+1)*(n_p[k]+1))/3.
             K[k,j] = K[j,k]
             covmat[k,j] = covmat[j,k]
@@ -789,6 +791,19 @@ def sen_seasonal_slopes(x):
     return szn_medslopes, medslope
 
 
+def _masked_mean_var(a, axis, n):
+    """Mean and unbiased variance of the masked array `a` along `axis`.
+
+    `n` is the number of unmasked values along `axis`, as returned by
+    ``a.count(axis)``; it is shared by both reductions instead of being
+    recounted by ``a.mean`` and ``a.var``, and the mean is computed once.
+    """
+    m = ma.divide(a.sum(axis), n)
+    d = a - ma.expand_dims(m, axis)
+    v = ma.divide((d*d).sum(axis), n - 1.)
+    return m, v
+
+
 def ttest_1samp(a, popmean, axis=0):
     """
     Calculates the T-test for the mean of ONE group of scores.
@@ -820,12 +835,10 @@ def ttest_1samp(a, popmean, axis=0):
     if a.size == 0:
         return (np.nan, np.nan)
 
-    x = a.mean(axis=axis)
-    v = a.var(axis=axis, ddof=1)
     n = a.count(axis=axis)
+    x, v = _masked_mean_var(a, axis, n)
     df = n - 1.
-    svar = ((n - 1) * v) / df
-    t = (x - popmean) / ma.sqrt(svar / n)
+    t = (x - popmean) / ma.sqrt(v / n)
     prob = _betai(0.5*df, 0.5, df/(df + t*t))
 
     Ttest_1sampResult = namedtuple('Ttest_1sampResult', ('statistic', 'pvalue'))
@@ -870,9 +883,9 @@ def ttest_ind(a, b, axis=0, equal_var=True):
     if a.size == 0 or b.size == 0:
         return Ttest_indResult(np.nan, np.nan)
 
-    (x1, x2) = (a.mean(axis), b.mean(axis))
-    (v1, v2) = (a.var(axis=axis, ddof=1), b.var(axis=axis, ddof=1))
     (n1, n2) = (a.count(axis), b.count(axis))
+    (x1, v1) = _masked_mean_var(a, axis, n1)
+    (x2, v2) = _masked_mean_var(b, axis, n2)
 
     if equal_var:
         df = n1 + n2 - 2.
@@ -1811,7 +1824,8 @@ def moment(a, moment=1, axis=0):
         # Starting point for exponentiation by squares
         a_zero_mean = a - ma.expand_dims(a.mean(axis), axis)
         if n_list[-1] == 1:
-            s = a_zero_mean.copy()
+            # no copy needed, the first squaring below allocates `s`
+            s = a_zero_mean
         else:
             s = a_zero_mean**2
 
@@ -2040,10 +2054,15 @@ def stde_median(data, axis=None):
 
     """
     def _stdemed_1D(data):
-        data = np.sort(data.compressed())
+        data = data.compressed()
         n = len(data)
         z = 2.5758293035489004
         k = int(np.round((n+1)/2. - z * np.sqrt(n/4.),0))
+        # only two order statistics are needed, a partial sort is enough
+        try:
+            data = np.partition(data, [k-1, n-k])
+        except AttributeError:
+            data = np.sort(data)
         return ((data[n-k] - data[k-1])/(2.*z))
 
     data = ma.array(data, copy=False, subok=True)
@@ -2295,7 +2314,7 @@ def mquantiles(a, prob=list([.25,.5,.75]), alphap=.4, betap=.4, axis=None,
 
     """
     def _quantiles1D(data,m,p):
-        x = np.sort(data.compressed())
+        x = data.compressed()
         n = len(x)
         if n == 0:
             return ma.array(np.empty(len(p), dtype=float), mask=True)
@@ -2304,7 +2323,13 @@ def mquantiles(a, prob=list([.25,.5,.75]), alphap=.4, betap=.4, axis=None,
         aleph = (n*p + m)
         k = np.floor(aleph.clip(1, n-1)).astype(int)
         gamma = (aleph-k).clip(0,1)
-        return (1.-gamma)*x[(k-1).tolist()] + gamma*x[k.tolist()]
+        # only the order statistics on either side of each quantile are
+        # needed, so a partial sort is enough
+        try:
+            x = np.partition(x, np.unique(np.concatenate((k-1, k))))
+        except AttributeError:
+            x = np.sort(x)
+        return (1.-gamma)*x[k-1] + gamma*x[k]
 
     data = ma.array(a, copy=False)
     if data.ndim > 2:
@@ -2402,12 +2427,14 @@ def obrientransform(*args):
     Returns: transformed data for use in an ANOVA
     """
     data = argstoarray(*args).T
-    v = data.var(axis=0,ddof=1)
     m = data.mean(0)
     n = data.count(0).astype(float)
     # result = ((N-1.5)*N*(a-m)**2 - 0.5*v*(n-1))/((n-1)*(n-2))
     data -= m
-    data **= 2
+    data *= data
+    # the squared deviations are at hand, so take the variance from them
+    # instead of a separate var() pass over the data
+    v = data.sum(0) / (n-1)
     data *= (n-1.5)*n
     data -= 0.5*v*(n-1)
     data /= (n-1.)*(n-2.)
@@ -2533,7 +2560,11 @@ def f_value_wilks_lambda(ER, EF, dfnum, dfden, a, b):
         raise NotImplementedError("Not implemented when the inputs "
                                   "have missing data")
 
-    lmbda = np.linalg.det(EF) / np.linalg.det(ER)
+    # Take the ratio of determinants in log space, so that large error
+    # matrices do not overflow the individual determinants.
+    sign_ef, logdet_ef = np.linalg.slogdet(EF)
+    sign_er, logdet_er = np.linalg.slogdet(ER)
+    lmbda = sign_ef * sign_er * np.exp(logdet_ef - logdet_er)
     q = ma.sqrt(((a-1)**2*(b-1)**2 - 2) / ((a-1)**2 + (b-1)**2 - 5))
     q = ma.filled(q, 1)
     n_um = (1 - lmbda**(1.0/q))*(a-1)*(b-1)
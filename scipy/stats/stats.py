@@ -172,11 +172,9 @@ import warnings
 import math
 from collections import namedtuple
 
-from scipy._lib.six import xrange
-
 # Scipy imports.
 from scipy._lib.six import callable, string_types
-from numpy import array, asarray, ma, zeros
+from numpy import array, asarray, ma
 import scipy.special as special
 import scipy.linalg as linalg
 import numpy as np
@@ -185,7 +183,7 @@ from . import mstats_basic
 from ._distn_infrastructure import _lazywhere
 from ._stats_mstats_common import find_repeats, linregress, theilslopes
 
-from ._rank import rankdata, tiecorrect
+from ._rank import rankdata, tiecorrect, _kendall_dis
 
 __all__ = ['find_repeats', 'gmean', 'hmean', 'mode', 'tmean', 'tvar',
            'tmin', 'tmax', 'tstd', 'tsem', 'moment', 'variation',
@@ -641,20 +639,70 @@ def mode(a, axis=0, nan_policy='propagate'):
         a = ma.masked_invalid(a)
         return mstats_basic.mode(a, axis)
 
-    scores = np.unique(np.ravel(a))       # get ALL unique values
+    # Sort every slice along `axis` and find its longest run of equal
+    # values.  This replaces a pass over the data for each unique score with
+    # a single sort; the first longest run in a sorted slice is its smallest
+    # modal value, so ties are broken as before.
     testshape = list(a.shape)
     testshape[axis] = 1
-    oldmostfreq = np.zeros(testshape, dtype=a.dtype)
-    oldcounts = np.zeros(testshape, dtype=int)
-    for score in scores:
-        template = (a == score)
-        counts = np.expand_dims(np.sum(template, axis), axis)
-        mostfrequent = np.where(counts > oldcounts, score, oldmostfreq)
-        oldcounts = np.maximum(counts, oldcounts)
-        oldmostfreq = mostfrequent
+    n = a.shape[axis]
+    srt = np.sort(np.rollaxis(a, axis, a.ndim).reshape(-1, n), axis=-1)
+
+    # flag the first element of each run of equal values
+    run_start = np.ones(srt.shape, dtype=bool)
+    run_start[:, 1:] = srt[:, 1:] != srt[:, :-1]
+    starts = np.flatnonzero(run_start)
+    lengths = np.diff(np.append(starts, srt.size))
+    rows = starts // n
+    if contains_nan:
+        # nan never compares equal to a score, so it is never counted; a
+        # slice with nothing but nan gives a mode of 0 with count 0
+        lengths[np.isnan(srt.ravel()[starts])] = 0
+
+    # every slice starts a run in its first column
+    oldcounts = np.maximum.reduceat(lengths, np.flatnonzero(starts % n == 0))
+    longest = np.flatnonzero(lengths == oldcounts[rows])
+    first = np.ones(longest.shape, dtype=bool)
+    first[1:] = rows[longest[1:]] != rows[longest[:-1]]
+    mostfrequent = srt.ravel()[starts[longest[first]]]
+    if contains_nan:
+        mostfrequent[oldcounts == 0] = 0
 
     ModeResult = namedtuple('ModeResult', ('mode', 'count'))
-    return ModeResult(mostfrequent, oldcounts)
+    return ModeResult(mostfrequent.reshape(testshape),
+                      oldcounts.reshape(testshape))
+
+
+def _limits_mask(a, limits, inclusive):
+    """Boolean mask of the values of `a` that lie within the given limits.
+
+    A limit of None is treated as unbounded.  The mask is built from a single
+    comparison per limit, so values that compare false against both limits
+    (e.g. nan) are kept.
+    """
+    lower_limit, upper_limit = limits
+    lower_include, upper_include = inclusive
+    if lower_limit is None:
+        lower_limit = -np.inf
+    if upper_limit is None:
+        upper_limit = np.inf
+    below = np.less if lower_include else np.less_equal
+    above = np.greater if upper_include else np.greater_equal
+    return ~(below(a, lower_limit) | above(a, upper_limit))
+
+
+def _values_within_limits(a, limits, inclusive):
+    """Select the values of `a` within the given limits as a 1-D array.
+
+    Unlike `_mask_to_limits` this returns a plain ndarray, so the reductions
+    done on it avoid the masked-array overhead.  Boolean indexing flattens
+    `a` by itself, so there is no need to ravel it first.  A ValueError is
+    raised if there are no values within the given limits.
+    """
+    a = a[_limits_mask(a, limits, inclusive)]
+    if a.size == 0:
+        raise ValueError("No array values within given limits")
+    return a
 
 
 def _mask_to_limits(a, limits, inclusive):
@@ -681,20 +729,7 @@ def _mask_to_limits(a, limits, inclusive):
     ------
     A ValueError if there are no values within the given limits.
     """
-    lower_limit, upper_limit = limits
-    lower_include, upper_include = inclusive
-    am = ma.MaskedArray(a)
-    if lower_limit is not None:
-        if lower_include:
-            am = ma.masked_less(am, lower_limit)
-        else:
-            am = ma.masked_less_equal(am, lower_limit)
-
-    if upper_limit is not None:
-        if upper_include:
-            am = ma.masked_greater(am, upper_limit)
-        else:
-            am = ma.masked_greater_equal(am, upper_limit)
+    am = ma.MaskedArray(a, mask=~_limits_mask(a, limits, inclusive))
 
     if am.count() == 0:
         raise ValueError("No array values within given limits")
@@ -747,8 +782,8 @@ def tmean(a, limits=None, inclusive=(True, True), axis=None):
     if limits is None:
         return np.mean(a, None)
 
-    am = _mask_to_limits(a.ravel(), limits, inclusive)
-    return am.mean(axis=axis)
+    a = _values_within_limits(a, limits, inclusive)
+    return a.mean(axis=axis)
 
 
 def tvar(a, limits=None, inclusive=(True, True), axis=0, ddof=1):
@@ -797,13 +832,14 @@ def tvar(a, limits=None, inclusive=(True, True), axis=0, ddof=1):
     20.0
 
     """
-    a = asarray(a)
-    a = a.astype(float).ravel()
+    # only convert (and copy) when `a` is not already a float array; the
+    # reductions below work over the whole array, so it is not raveled
+    a = asarray(a, dtype=float)
     if limits is None:
-        n = len(a)
+        n = a.size
         return a.var() * n/(n-1.)
-    am = _mask_to_limits(a, limits, inclusive)
-    return np.ma.var(am, ddof=ddof, axis=axis)
+    a = _values_within_limits(a, limits, inclusive)
+    return a.var(ddof=ddof, axis=axis)
 
 
 def tmin(a, lowerlimit=None, axis=0, inclusive=True, nan_policy='propagate'):
@@ -1016,13 +1052,13 @@ def tsem(a, limits=None, inclusive=(True, True), axis=0, ddof=1):
     1.1547005383792515
 
     """
-    a = np.asarray(a).ravel()
+    a = np.asarray(a)
     if limits is None:
         return a.std(ddof=ddof) / np.sqrt(a.size)
 
-    am = _mask_to_limits(a, limits, inclusive)
-    sd = np.sqrt(np.ma.var(am, ddof=ddof, axis=axis))
-    return sd / np.sqrt(am.count())
+    a = _values_within_limits(a, limits, inclusive)
+    sd = np.sqrt(a.var(ddof=ddof, axis=axis))
+    return sd / np.sqrt(a.size)
 
 
 #####################################
@@ -1094,7 +1130,9 @@ def moment(a, moment=1, axis=0, nan_policy='propagate'):
         if np.isscalar(moment):
             return np.nan
         else:
-            return np.ones(np.asarray(moment).shape, dtype=np.float64) * np.nan
+            out = np.empty(np.asarray(moment).shape, dtype=np.float64)
+            out.fill(np.nan)
+            return out
 
     # for array_like moment input, return a value for each.
     if not np.isscalar(moment):
@@ -1103,7 +1141,7 @@ def moment(a, moment=1, axis=0, nan_policy='propagate'):
     else:
         return _moment(a, moment, axis)
 
-def _moment(a, moment, axis):
+def _moment(a, moment, axis, mean=None):
     if np.abs(moment - np.round(moment)) > 0:
         raise ValueError("All moment parameters must be integers")
 
@@ -1134,21 +1172,27 @@ def _moment(a, moment, axis):
         current_n = moment
         while current_n > 2:
             if current_n % 2:
-                current_n = (current_n-1)/2
+                current_n = (current_n - 1) // 2
             else:
-                current_n /= 2
+                current_n //= 2
             n_list.append(current_n)
 
         # Starting point for exponentiation by squares
-        a_zero_mean = a - np.expand_dims(np.mean(a, axis), axis)
+        if mean is None:
+            mean = np.expand_dims(np.mean(a, axis), axis)
+        a_zero_mean = a - mean
         if n_list[-1] == 1:
-            s = a_zero_mean.copy()
+            # no copy needed, the first squaring below allocates `s`
+            s = a_zero_mean
         else:
-            s = a_zero_mean**2
+            s = a_zero_mean * a_zero_mean
 
-        # Perform multiplications
+        # Perform multiplications, in place once `s` owns its buffer
         for n in n_list[-2::-1]:
-            s = s**2
+            if s is a_zero_mean:
+                s = s * s
+            else:
+                np.multiply(s, s, out=s)
             if n % 2:
                 s *= a_zero_mean
         return np.mean(s, axis)
@@ -1247,8 +1291,10 @@ def skew(a, axis=0, bias=True, nan_policy='propagate'):
     if contains_nan and nan_policy == 'propagate':
         return np.nan
 
-    m2 = moment(a, 2, axis)
-    m3 = moment(a, 3, axis)
+    # compute the mean once and share it between both central moments
+    mean = np.expand_dims(a.mean(axis), axis)
+    m2 = _moment(a, 2, axis, mean)
+    m3 = _moment(a, 3, axis, mean)
     zero = (m2 == 0)
     vals = _lazywhere(~zero, (m2, m3),
                              lambda m2, m3: m3 / m2**1.5,
@@ -1322,8 +1368,9 @@ def kurtosis(a, axis=0, fisher=True, bias=True, nan_policy='propagate'):
         return np.nan
 
     n = a.shape[axis]
-    m2 = moment(a, 2, axis)
-    m4 = moment(a, 4, axis)
+    mean = np.expand_dims(a.mean(axis), axis)
+    m2 = _moment(a, 2, axis, mean)
+    m4 = _moment(a, 4, axis, mean)
     zero = (m2 == 0)
     olderr = np.seterr(all='ignore')
     try:
@@ -1487,7 +1534,13 @@ def skewtest(a, axis=0, nan_policy='propagate'):
         a = np.ravel(a)
         axis = 0
     b2 = skew(a, axis)
-    n = float(a.shape[axis])
+    Z = _skewtest_z(b2, float(a.shape[axis]))
+
+    return SkewtestResult(Z, 2 * distributions.norm.sf(np.abs(Z)))
+
+
+def _skewtest_z(b2, n):
+    """Z-score of the skewness test for sample skewness `b2` of `n` values."""
     if n < 8:
         raise ValueError(
             "skewtest is not valid with less than 8 samples; %i samples"
@@ -1498,10 +1551,8 @@ def skewtest(a, axis=0, nan_policy='propagate'):
     W2 = -1 + math.sqrt(2 * (beta2 - 1))
     delta = 1 / math.sqrt(0.5 * math.log(W2))
     alpha = math.sqrt(2.0 / (W2 - 1))
-    y = np.where(y == 0, 1, y)
-    Z = delta * np.log(y / alpha + np.sqrt((y / alpha)**2 + 1))
-
-    return SkewtestResult(Z, 2 * distributions.norm.sf(np.abs(Z)))
+    y = np.where(y == 0, 1, y) / alpha
+    return delta * np.log(y + np.sqrt(y*y + 1))
 
 
 def kurtosistest(a, axis=0, nan_policy='propagate'):
@@ -1550,6 +1601,15 @@ def kurtosistest(a, axis=0, nan_policy='propagate'):
         return KurtosistestResult(np.nan, np.nan)
 
     n = float(a.shape[axis])
+    b2 = kurtosis(a, axis, fisher=False)
+    Z = _kurtosistest_z(b2, n)
+
+    # zprob uses upper tail, so Z needs to be positive
+    return KurtosistestResult(Z, 2 * distributions.norm.sf(np.abs(Z)))
+
+
+def _kurtosistest_z(b2, n):
+    """Z-score of the kurtosis test for sample kurtosis `b2` of `n` values."""
     if n < 5:
         raise ValueError(
             "kurtosistest requires at least 5 observations; %i observations"
@@ -1557,8 +1617,6 @@ def kurtosistest(a, axis=0, nan_policy='propagate'):
     if n < 20:
         warnings.warn("kurtosistest only valid for n>=20 ... continuing "
                       "anyway, n=%i" % int(n))
-    b2 = kurtosis(a, axis, fisher=False)
-
     E = 3.0*(n-1) / (n+1)
     varb2 = 24.0*n*(n-2)*(n-3) / ((n+1)*(n+1.)*(n+3)*(n+5))
     x = (b2-E) / np.sqrt(varb2)
@@ -1573,9 +1631,7 @@ def kurtosistest(a, axis=0, nan_policy='propagate'):
     Z = np.where(denom == 99, 0, Z)
     if Z.ndim == 0:
         Z = Z[()]
-
-    # zprob uses upper tail, so Z needs to be positive
-    return KurtosistestResult(Z, 2 * distributions.norm.sf(np.abs(Z)))
+    return Z
 
 
 def normaltest(a, axis=0, nan_policy='propagate'):
@@ -1630,8 +1686,23 @@ def normaltest(a, axis=0, nan_policy='propagate'):
     if contains_nan and nan_policy == 'propagate':
         return NormaltestResult(np.nan, np.nan)
 
-    s, _ = skewtest(a, axis)
-    k, _ = kurtosistest(a, axis)
+    # Compute the central moments once and share them between the skewness
+    # and kurtosis tests, instead of calling skewtest and kurtosistest.
+    n = float(a.shape[axis])
+    mean = np.expand_dims(a.mean(axis), axis)
+    m2 = _moment(a, 2, axis, mean)
+    m3 = _moment(a, 3, axis, mean)
+    m4 = _moment(a, 4, axis, mean)
+    zero = (m2 == 0)
+    olderr = np.seterr(all='ignore')
+    try:
+        b2_skew = np.where(zero, 0, m3 / m2**1.5)
+        b2_kurt = np.where(zero, 0, m4 / m2**2.0)
+    finally:
+        np.seterr(**olderr)
+
+    s = _skewtest_z(b2_skew, n)
+    k = _kurtosistest_z(b2_kurt, n)
     k2 = s*s + k*k
 
     return NormaltestResult(k2, distributions.chi2.sf(k2, 2))
@@ -1684,9 +1755,14 @@ def jarque_bera(x):
         raise ValueError('At least one observation is required.')
 
     mu = x.mean()
-    diffx = x - mu
-    skewness = (1 / n * np.sum(diffx**3)) / (1 / n * np.sum(diffx**2))**(3 / 2.)
-    kurtosis = (1 / n * np.sum(diffx**4)) / (1 / n * np.sum(diffx**2))**2
+    diffx = np.ravel(x) - mu
+    # Central moments as inner products, sharing the squared deviations.
+    sqdiffx = diffx * diffx
+    m2 = np.sum(sqdiffx) / n
+    m3 = np.dot(sqdiffx, diffx) / n
+    m4 = np.dot(sqdiffx, sqdiffx) / n
+    skewness = m3 / m2**(3 / 2.)
+    kurtosis = m4 / m2**2
     jb_value = n / 6 * (skewness**2 + (kurtosis - 3)**2 / 4)
     p = 1 - distributions.chi2.cdf(jb_value, 2)
 
@@ -1733,8 +1809,13 @@ def itemfreq(a):
            [ 0.5,  1. ]])
 
     """
-    items, inv = np.unique(a, return_inverse=True)
-    freq = np.bincount(inv)
+    # return_counts is preferred but it only exists in numpy 1.9.0 and
+    # higher, in those cases we count via the inverse indices
+    try:
+        items, freq = np.unique(a, return_counts=True)
+    except TypeError:
+        items, inv = np.unique(a, return_inverse=True)
+        freq = np.bincount(inv)
     return np.array([items, freq]).T
 
 
@@ -1805,15 +1886,32 @@ def scoreatpercentile(a, per, limit=(), interpolation_method='fraction',
         if np.isscalar(per):
             return np.nan
         else:
-            return np.ones(np.asarray(per).shape, dtype=np.float64) * np.nan
+            out = np.empty(np.asarray(per).shape, dtype=np.float64)
+            out.fill(np.nan)
+            return out
 
     if limit:
         a = a[(limit[0] <= a) & (a <= limit[1])]
 
-    sorted = np.sort(a, axis=axis)
     if axis is None:
+        a = a.ravel()
         axis = 0
 
+    # Only the order statistics on either side of each requested percentile
+    # are needed, so a partial sort is enough.  np.partition only exists in
+    # numpy 1.8.0 and higher, fall back to a full sort for older versions.
+    n = a.shape[axis]
+    if n == 0:
+        sorted = a
+    else:
+        idx = np.asarray(per, dtype=float).ravel() / 100. * (n - 1)
+        kth = np.concatenate((np.floor(idx), np.ceil(idx)))
+        kth = np.unique(np.clip(kth, 0, n - 1).astype(np.intp))
+        try:
+            sorted = np.partition(a, kth, axis=axis)
+        except AttributeError:
+            sorted = np.sort(a, axis=axis)
+
     return _compute_qth_percentile(sorted, per, interpolation_method, axis)
 
 
@@ -1935,16 +2033,18 @@ def percentileofscore(a, score, kind='rank'):
     n = len(a)
 
     if kind == 'rank':
-        if not np.any(a == score):
-            a = np.append(a, score)
-            a_len = np.array(list(range(len(a))))
+        if n == 0 or np.isnan(score):
+            return np.nan
+        # The ranks follow from the number of values below and at `score`, so
+        # there is no need to sort `a`.
+        left = np.count_nonzero(a < score)
+        right = np.count_nonzero(a <= score)
+        if right > left:
+            # average of the (1-based) ranks left + 1, ..., right of the matches
+            return (left + right + 1) * 50.0 / n
         else:
-            a_len = np.array(list(range(len(a)))) + 1.0
-
-        a = np.sort(a)
-        idx = [a == score]
-        pct = (np.mean(a_len[idx]) / n) * 100.0
-        return pct
+            # rank `score` would get if it were inserted into `a`
+            return left * 100.0 / n
 
     elif kind == 'strict':
         return np.sum(a < score) / float(n) * 100
@@ -2051,13 +2151,13 @@ def histogram(a, numbins=10, defaultlimits=None, weights=None, printextras=False
     hist, bin_edges = np.histogram(a, bins=numbins, range=defaultlimits,
                                    weights=weights)
     # hist are not always floats, convert to keep with old output
-    hist = np.array(hist, dtype=float)
+    hist = np.asarray(hist, dtype=float)
     # fixed width for bins is assumed, as numpy's histogram gives
     # fixed width bins for int values for 'bins'
     binsize = bin_edges[1] - bin_edges[0]
     # calculate number of extra points
-    extrapoints = len([v for v in a
-                       if defaultlimits[0] > v or v > defaultlimits[1]])
+    extrapoints = np.count_nonzero((a < defaultlimits[0]) |
+                                   (a > defaultlimits[1]))
     if extrapoints > 0 and printextras:
         warnings.warn("Points outside given histogram range = %s"
                       % extrapoints)
@@ -2140,7 +2240,7 @@ def cumfreq(a, numbins=10, defaultreallimits=None, weights=None):
 
     """
     h, l, b, e = histogram(a, numbins, defaultreallimits, weights=weights)
-    cumhist = np.cumsum(h * 1, axis=0)
+    cumhist = np.cumsum(h, axis=0)
 
     CumfreqResult = namedtuple('CumfreqResult', ('cumcount', 'lowerlimit',
                                                  'binsize', 'extrapoints'))
@@ -2218,7 +2318,8 @@ def relfreq(a, numbins=10, defaultreallimits=None, weights=None):
     """
     a = np.asanyarray(a)
     h, l, b, e = histogram(a, numbins, defaultreallimits, weights=weights)
-    h = h / float(a.shape[0])
+    # `h` is a fresh array from `histogram`, so it can be scaled in place
+    h /= float(a.shape[0])
 
     RelfreqResult = namedtuple('RelfreqResult', ('frequency', 'lowerlimit',
                                                  'binsize', 'extrapoints'))
@@ -2229,6 +2330,26 @@ def relfreq(a, numbins=10, defaultreallimits=None, weights=None):
 #        VARIABILITY FUNCTIONS      #
 #####################################
 
+def _obrien_transform(sq, n, sumsq, var, group_mean):
+    """
+    The O'Brien transform of the squared deviations `sq`.
+
+    `n` and `sumsq` are the length and the sum of squares of the group of
+    each element of `sq`.  `group_mean` reduces the transformed values to
+    their group means, which must equal the group variances `var`.
+    """
+    TINY = np.sqrt(np.finfo(float).eps)
+
+    t = ((n - 1.5) * n * sq - 0.5 * sumsq) / ((n - 1) * (n - 2))
+
+    # Check that the mean of the transformed data is equal to the
+    # original variance.
+    if np.any(abs(var - group_mean(t)) > TINY):
+        raise ValueError('Lack of convergence in obrientransform.')
+
+    return t
+
+
 def obrientransform(*args):
     """
     Computes the O'Brien transform on input data (any number of arrays).
@@ -2280,28 +2401,42 @@ def obrientransform(*args):
     If we require that ``p < 0.05`` for significance, we cannot conclude
     that the variances are different.
     """
-    TINY = np.sqrt(np.finfo(float).eps)
-
-    # `arrays` will hold the transformed arguments.
-    arrays = []
-
-    for arg in args:
-        a = np.asarray(arg)
-        n = len(a)
-        mu = np.mean(a)
-        sq = (a - mu)**2
-        sumsq = sq.sum()
-
-        # The O'Brien transform.
-        t = ((n - 1.5) * n * sq - 0.5 * sumsq) / ((n - 1) * (n - 2))
+    args = [np.asarray(arg) for arg in args]
+    sizes = np.array([a.size for a in args], dtype=np.intp)
+    k = len(args)
 
-        # Check that the mean of the transformed data is equal to the
-        # original variance.
-        var = sumsq / (n - 1)
-        if abs(var - np.mean(t)) > TINY:
-            raise ValueError('Lack of convergence in obrientransform.')
+    # With many small groups the Python overhead per group dominates, so
+    # handle all groups at once: concatenate the (flattened) arguments and
+    # get the per-group sums from np.bincount on group labels.  That costs a
+    # gather per element, which loses to the plain loop once groups average
+    # a few hundred values, and bincount only takes real weights.
+    if (k > 1 and sizes.sum() < 256 * k and
+            all(a.dtype.kind in 'biuf' for a in args)):
+        lens = np.array([len(a) for a in args])
+        labels = np.repeat(np.arange(k), sizes)
+        data = np.concatenate([a.ravel() for a in args])
+
+        mu = np.bincount(labels, data, minlength=k) / sizes
+        sq = (data - mu[labels])**2
+        sumsq = np.bincount(labels, sq, minlength=k)
+
+        group_mean = lambda t: np.bincount(labels, t, minlength=k) / sizes
+        t = _obrien_transform(sq, lens[labels], sumsq[labels],
+                              sumsq / (lens - 1), group_mean)
+
+        # `arrays` will hold the transformed arguments.
+        arrays = [x.reshape(a.shape) for x, a in
+                  zip(np.split(t, np.cumsum(sizes)[:-1]), args)]
+    else:
+        # `arrays` will hold the transformed arguments.
+        arrays = []
 
-        arrays.append(t)
+        for a in args:
+            n = len(a)
+            sq = (a - np.mean(a))**2
+            sumsq = sq.sum()
+            arrays.append(_obrien_transform(sq, n, sumsq, sumsq / (n - 1),
+                                            np.mean))
 
     # If the arrays are not all the same shape, calling np.array(arrays)
     # creates a 1-D array with dtype `object` in numpy 1.6+. In numpy
@@ -2392,7 +2527,9 @@ def sem(a, axis=0, ddof=1, nan_policy='propagate'):
     1.2893796958227628
 
     """
-    a, axis = _chk_asarray(a, axis)
+    # reduce over the original layout for axis=None instead of raveling,
+    # which copies non-contiguous input
+    a = np.atleast_1d(np.asarray(a))
 
     contains_nan, nan_policy = _contains_nan(a, nan_policy)
 
@@ -2403,7 +2540,7 @@ def sem(a, axis=0, ddof=1, nan_policy='propagate'):
     if contains_nan and nan_policy == 'propagate':
         return np.nan
 
-    n = a.shape[axis]
+    n = a.size if axis is None else a.shape[axis]
     s = np.std(a, axis=axis, ddof=ddof) / np.sqrt(n)
     return s
 
@@ -2464,10 +2601,13 @@ def zscore(a, axis=0, ddof=0):
     mns = a.mean(axis=axis)
     sstd = a.std(axis=axis, ddof=ddof)
     if axis and mns.ndim < a.ndim:
-        return ((a - np.expand_dims(mns, axis=axis)) /
-                np.expand_dims(sstd, axis=axis))
-    else:
-        return (a - mns) / sstd
+        mns = np.expand_dims(mns, axis=axis)
+        sstd = np.expand_dims(sstd, axis=axis)
+    # divide the deviations in place rather than allocating a second
+    # full-size temporary for the quotient
+    z = a - mns
+    z /= sstd
+    return z
 
 
 def zmap(scores, compare, axis=0, ddof=0):
@@ -2516,10 +2656,11 @@ def zmap(scores, compare, axis=0, ddof=0):
     mns = compare.mean(axis=axis)
     sstd = compare.std(axis=axis, ddof=ddof)
     if axis and mns.ndim < compare.ndim:
-        return ((scores - np.expand_dims(mns, axis=axis)) /
-                np.expand_dims(sstd, axis=axis))
-    else:
-        return (scores - mns) / sstd
+        mns = np.expand_dims(mns, axis=axis)
+        sstd = np.expand_dims(sstd, axis=axis)
+    z = scores - mns
+    z /= sstd
+    return z
 
 
 #####################################
@@ -2562,12 +2703,9 @@ def threshold(a, threshmin=None, threshmax=None, newval=0):
 
     """
     a = asarray(a).copy()
-    mask = zeros(a.shape, dtype=bool)
-    if threshmin is not None:
-        mask |= (a < threshmin)
-    if threshmax is not None:
-        mask |= (a > threshmax)
-    a[mask] = newval
+    # the values to replace are those outside the (inclusive) limits
+    mask = _limits_mask(a, (threshmin, threshmax), (True, True))
+    a[~mask] = newval
     return a
 
 
@@ -2924,14 +3062,25 @@ def f_oneway(*args):
     offset = alldata.mean()
     alldata -= offset
 
-    sstot = _sum_of_squares(alldata) - (_square_of_sums(alldata) / float(bign))
-    ssbn = 0
-    for a in args:
-        ssbn += _square_of_sums(a - offset) / float(len(a))
+    normalized_ss = _square_of_sums(alldata) / float(bign)
+    sstot = _sum_of_squares(alldata) - normalized_ss
+    # Group sums of the centered data, in one pass along the first axis.
+    # reduceat cannot express an empty group, so those (which make the
+    # result nan anyway) go through the per-group sums.
+    lengths = np.array([len(a) for a in args])
+    if lengths.all():
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        group_sums = np.add.reduceat(alldata, starts, axis=0)
+        lengths = lengths.reshape((-1,) + (1,) * (alldata.ndim - 1))
+        ssbn = np.sum(group_sums**2 / lengths, axis=0)
+    else:
+        ssbn = 0
+        for a in args:
+            ssbn += _square_of_sums(a - offset) / float(len(a))
 
     # Naming: variables ending in bn/b are for "between treatments", wn/w are
     # for "within treatments"
-    ssbn -= (_square_of_sums(alldata) / float(bign))
+    ssbn -= normalized_ss
     sswn = sstot - ssbn
     dfbn = num_groups - 1
     dfwn = bign - num_groups
@@ -2987,7 +3136,8 @@ def pearsonr(x, y):
     mx = x.mean()
     my = y.mean()
     xm, ym = x - mx, y - my
-    r_num = np.add.reduce(xm * ym)
+    # inner products avoid the elementwise-product temporaries
+    r_num = np.dot(xm, ym)
     r_den = np.sqrt(_sum_of_squares(xm) * _sum_of_squares(ym))
     r = r_num / r_den
 
@@ -3490,47 +3640,6 @@ def kendalltau(x, y, initial_lexsort=True, nan_policy='propagate'):
         return mstats_basic.kendalltau(x, y)
 
     n = np.int64(len(x))
-    temp = list(range(n))  # support structure used by mergesort
-    # this closure recursively sorts sections of perm[] by comparing
-    # elements of y[perm[]] using temp[] as support
-    # returns the number of swaps required by an equivalent bubble sort
-
-    def mergesort(offs, length):
-        exchcnt = 0
-        if length == 1:
-            return 0
-        if length == 2:
-            if y[perm[offs]] <= y[perm[offs+1]]:
-                return 0
-            t = perm[offs]
-            perm[offs] = perm[offs+1]
-            perm[offs+1] = t
-            return 1
-        length0 = length // 2
-        length1 = length - length0
-        middle = offs + length0
-        exchcnt += mergesort(offs, length0)
-        exchcnt += mergesort(middle, length1)
-        if y[perm[middle - 1]] < y[perm[middle]]:
-            return exchcnt
-
-        # merging
-        i = j = k = 0
-        while j < length0 or k < length1:
-            if k >= length1 or (j < length0 and y[perm[offs + j]] <=
-                                                y[perm[middle + k]]):
-                temp[i] = perm[offs + j]
-                d = i - j
-                j += 1
-            else:
-                temp[i] = perm[middle + k]
-                d = (offs + i) - (middle + k)
-                k += 1
-            if d > 0:
-                exchcnt += d
-            i += 1
-        perm[offs:offs+length] = temp[0:length]
-        return exchcnt
 
     # initial sort on values of x and, if tied, on values of y
     if initial_lexsort:
@@ -3541,34 +3650,30 @@ def kendalltau(x, y, initial_lexsort=True, nan_policy='propagate'):
         perm = list(range(n))
         perm.sort(key=lambda a: (x[a], y[a]))
 
+    def count_tied_pairs(*keys):
+        # number of pairs tied in all of `keys`, which must be ordered such
+        # that tied elements are adjacent; counted from the run lengths
+        change = np.zeros(n - 1, dtype=bool)
+        for key in keys:
+            change |= key[1:] != key[:-1]
+        cnt = np.diff(np.flatnonzero(np.concatenate(([True], change, [True]))))
+        cnt = cnt.astype(np.int64)
+        return (cnt * (cnt - 1) // 2).sum()
+
     # compute joint ties
-    first = 0
-    t = 0
-    for i in xrange(1, n):
-        if x[perm[first]] != x[perm[i]] or y[perm[first]] != y[perm[i]]:
-            t += ((i - first) * (i - first - 1)) // 2
-            first = i
-    t += ((n - first) * (n - first - 1)) // 2
+    xs, ys = x[perm], y[perm]
+    t = count_tied_pairs(xs, ys)
 
     # compute ties in x
-    first = 0
-    u = 0
-    for i in xrange(1, n):
-        if x[perm[first]] != x[perm[i]]:
-            u += ((i - first) * (i - first - 1)) // 2
-            first = i
-    u += ((n - first) * (n - first - 1)) // 2
-
-    # count exchanges
-    exchanges = mergesort(0, n)
-    # compute ties in y after mergesort with counting
-    first = 0
-    v = 0
-    for i in xrange(1, n):
-        if y[perm[first]] != y[perm[i]]:
-            v += ((i - first) * (i - first - 1)) // 2
-            first = i
-    v += ((n - first) * (n - first - 1)) // 2
+    u = count_tied_pairs(xs)
+
+    # count exchanges, i.e. the discordant pairs, on the dense ranks of y
+    y_inv = np.unique(y, return_inverse=True)[1].astype(np.intp).ravel()
+    exchanges = _kendall_dis(y_inv[perm], y_inv.max() + 1)
+
+    # compute ties in y from the size of each group of equal values
+    cnt = np.bincount(y_inv).astype(np.int64)
+    v = (cnt * (cnt - 1) // 2).sum()
 
     tot = (n * (n - 1)) // 2
     if tot == u or tot == v:
@@ -3662,8 +3767,8 @@ def ttest_1samp(a, popmean, axis=0, nan_policy='propagate'):
     n = a.shape[axis]
     df = n - 1
 
-    d = np.mean(a, axis) - popmean
-    v = np.var(a, axis, ddof=1)
+    m, v = _mean_var(a, axis)
+    d = m - popmean
     denom = np.sqrt(v / float(n))
 
     t = np.divide(d, denom)
@@ -3672,6 +3777,25 @@ def ttest_1samp(a, popmean, axis=0, nan_policy='propagate'):
     return Ttest_1sampResult(t, prob)
 
 
+def _mean_var(a, axis, ddof=1):
+    """Mean and variance of `a` along `axis`, sharing the mean between both.
+
+    `np.var` computes the mean internally, so calling `np.mean` as well
+    means two passes for the same quantity.  Here the mean is computed once
+    and the variance is taken from the deviations around it.  As with
+    `np.var`, the variance of complex input is real (the mean of ``|d|**2``).
+    """
+    n = a.shape[axis]
+    mean = np.mean(a, axis)
+    d = a - np.expand_dims(mean, axis)
+    if np.iscomplexobj(d):
+        d = (d * d.conj()).real
+    else:
+        np.multiply(d, d, out=d)
+    var = np.sum(d, axis) / float(max(n - ddof, 0))
+    return mean, var
+
+
 def _ttest_finish(df, t):
     """Common code between all 3 t-test functions."""
     prob = distributions.t.sf(np.abs(t), df) * 2  # use np.abs to get upper tail
@@ -3693,11 +3817,13 @@ def _ttest_ind_from_stats(mean1, mean2, denom, df):
 def _unequal_var_ttest_denom(v1, n1, v2, n2):
     vn1 = v1 / n1
     vn2 = v2 / n2
-    df = ((vn1 + vn2)**2) / ((vn1**2) / (n1 - 1) + (vn2**2) / (n2 - 1))
+    df = np.asarray(((vn1 + vn2)**2) /
+                    ((vn1**2) / (n1 - 1) + (vn2**2) / (n2 - 1)))
 
     # If df is undefined, variances are zero (assumes n1 > 0 & n2 > 0).
-    # Hence it doesn't matter what df is as long as it's not NaN.
-    df = np.where(np.isnan(df), 1, df)
+    # Hence it doesn't matter what df is as long as it's not NaN.  `df` is
+    # a fresh array, so patch it in place rather than building a new one.
+    df[np.isnan(df)] = 1
     denom = np.sqrt(vn1 + vn2)
     return df, denom
 
@@ -3878,8 +4004,8 @@ def ttest_ind(a, b, axis=0, equal_var=True, nan_policy='propagate'):
     if a.size == 0 or b.size == 0:
         return Ttest_indResult(np.nan, np.nan)
 
-    v1 = np.var(a, axis, ddof=1)
-    v2 = np.var(b, axis, ddof=1)
+    m1, v1 = _mean_var(a, axis)
+    m2, v2 = _mean_var(b, axis)
     n1 = a.shape[axis]
     n2 = b.shape[axis]
 
@@ -3888,7 +4014,7 @@ def ttest_ind(a, b, axis=0, equal_var=True, nan_policy='propagate'):
     else:
         df, denom = _unequal_var_ttest_denom(v1, n1, v2, n2)
 
-    res = _ttest_ind_from_stats(np.mean(a, axis), np.mean(b, axis), denom, df)
+    res = _ttest_ind_from_stats(m1, m2, denom, df)
 
     return Ttest_indResult(*res)
 
@@ -3973,8 +4099,7 @@ def ttest_rel(a, b, axis=0, nan_policy='propagate'):
     df = float(n - 1)
 
     d = (a - b).astype(np.float64)
-    v = np.var(d, axis, ddof=1)
-    dm = np.mean(d, axis)
+    dm, v = _mean_var(d, axis)
     denom = np.sqrt(v / float(n))
 
     t = np.divide(dm, denom)
@@ -4351,19 +4476,29 @@ def power_divergence(f_obs, f_exp=None, ddof=0, axis=0, lambda_=None):
 
     # `terms` is the array of terms that are summed along `axis` to create
     # the test statistic.  We use some specialized code for a few special
-    # cases of lambda_.
+    # cases of lambda_.  The terms are updated in place where possible to
+    # avoid allocating a temporary for every operation.
     if lambda_ == 1:
         # Pearson's chi-squared statistic
-        terms = (f_obs - f_exp)**2 / f_exp
+        terms = f_obs - f_exp
+        terms *= terms
+        # not in place: the frequencies may be integers, and for masked
+        # input the division has to update the mask
+        terms = terms / f_exp
     elif lambda_ == 0:
         # Log-likelihood ratio (i.e. G-test)
-        terms = 2.0 * special.xlogy(f_obs, f_obs / f_exp)
+        terms = special.xlogy(f_obs, f_obs / f_exp)
+        terms *= 2.0
     elif lambda_ == -1:
         # Modified log-likelihood ratio
-        terms = 2.0 * special.xlogy(f_exp, f_exp / f_obs)
+        terms = special.xlogy(f_exp, f_exp / f_obs)
+        terms *= 2.0
     else:
         # General Cressie-Read power divergence.
-        terms = f_obs * ((f_obs / f_exp)**lambda_ - 1)
+        terms = f_obs / f_exp
+        terms **= lambda_
+        terms -= 1
+        terms *= f_obs
         terms /= 0.5 * lambda_ * (lambda_ + 1)
 
     stat = terms.sum(axis=axis)
@@ -4562,7 +4697,9 @@ def ks_2samp(data1, data2):
     data_all = np.concatenate([data1, data2])
     cdf1 = np.searchsorted(data1, data_all, side='right') / (1.0*n1)
     cdf2 = np.searchsorted(data2, data_all, side='right') / (1.0*n2)
-    d = np.max(np.absolute(cdf1 - cdf2))
+    # take the difference in place rather than allocating two more arrays
+    cdf1 -= cdf2
+    d = np.max(np.absolute(cdf1, out=cdf1))
     # Note: d absolute not signed distance
     en = np.sqrt(n1 * n2 / float(n1 + n2))
     try:
@@ -4610,9 +4747,9 @@ def mannwhitneyu(x, y, use_continuity=True, alternative='two-sided'):
     n1 = len(x)
     n2 = len(y)
     ranked = rankdata(np.concatenate((x, y)))
-    rankx = ranked[0:n1]  # get the x-ranks
-    u1 = n1*n2 + (n1*(n1+1))/2.0 - np.sum(rankx, axis=0)  # calc U for x
-    u2 = n1*n2 - u1  # remainder is U for y
+    # U for y follows directly from the rank sum of x (a view of `ranked`)
+    u2 = np.add.reduce(ranked[:n1]) - (n1*(n1+1))/2.0
+    u1 = n1*n2 - u2  # calc U for x
     T = tiecorrect(ranked)
     if T == 0:
         raise ValueError('All numbers are identical in amannwhitneyu')
@@ -4677,8 +4814,7 @@ def ranksums(x, y):
     n2 = len(y)
     alldata = np.concatenate((x, y))
     ranked = rankdata(alldata)
-    x = ranked[:n1]
-    s = np.sum(x, axis=0)
+    s = np.add.reduce(ranked[:n1])
     expected = n1 * (n1+n2+1) / 2.0
     z = (s - expected) / np.sqrt(n1*n2*(n1+n2+1)/12.0)
     prob = 2 * distributions.norm.sf(abs(z))
@@ -4794,11 +4930,11 @@ def kruskal(*args, **kwargs):
     if ties == 0:
         raise ValueError('All numbers are identical in kruskal')
 
-    # Compute sum^2/n for each group and sum
+    # Compute sum^2/n for each group and sum.  The groups are contiguous in
+    # `ranked` and none of them is empty, so their rank sums can be taken
+    # in a single reduceat call.
     j = np.insert(np.cumsum(n), 0, 0)
-    ssbn = 0
-    for i in range(num_groups):
-        ssbn += _square_of_sums(ranked[j[i]:j[i+1]]) / float(n[i])
+    ssbn = np.sum(np.add.reduceat(ranked, j[:-1])**2 / n)
 
     totaln = np.sum(n)
     h = 12.0 / (totaln * (totaln + 1)) * ssbn - 3 * (totaln + 1)
@@ -4853,21 +4989,28 @@ def friedmanchisquare(*args):
         if len(args[i]) != n:
             raise ValueError('Unequal N in friedmanchisquare.  Aborting.')
 
-    # Rank data
-    data = np.vstack(args).T
-    data = data.astype(float)
-    for i in range(len(data)):
-        data[i] = rankdata(data[i])
+    # Rank the data within each row (block), all rows at once: sort every
+    # row and find the runs of tied values.  Runs never cross rows because
+    # the first element of each row always starts a new run.
+    data = np.asarray(np.vstack(args).T, dtype=float)
+    order = np.argsort(data, axis=1)
+    srt = data[np.arange(n)[:, np.newaxis], order]
+    run_start = np.ones((n, k), dtype=bool)
+    run_start[:, 1:] = srt[:, 1:] != srt[:, :-1]
+    run_start = run_start.ravel()
+    starts = np.flatnonzero(run_start)
+    cnt = np.diff(np.append(starts, n*k))
+
+    # a run of `cnt` ties starting at (0-based) position `first` in its row
+    # gets the average rank first + (cnt + 1) / 2
+    ranks = (starts % k + 0.5 * (cnt + 1))[np.cumsum(run_start) - 1]
 
     # Handle ties
-    ties = 0
-    for i in range(len(data)):
-        replist, repnum = find_repeats(array(data[i]))
-        for t in repnum:
-            ties += t * (t*t - 1)
+    ties = np.sum(cnt * (cnt*cnt - 1.))
     c = 1 - ties / float(k*(k*k - 1)*n)
 
-    ssbn = np.sum(data.sum(axis=0)**2)
+    # rank sums per treatment (column)
+    ssbn = np.sum(np.bincount(order.ravel(), ranks, minlength=k)**2)
     chisq = (12.0 / (k*n*(k+1)) * ssbn - 3*n*(k+1)) / c
 
     FriedmanchisquareResult = namedtuple('FriedmanchisquareResult',
@@ -5019,8 +5162,9 @@ def betai(a, b, x):
 
 
 def _betai(a, b, x):
-    x = np.asarray(x)
-    x = np.where(x < 1.0, x, 1.0)  # if x > 1 then return 1.0
+    # if x > 1 then return 1.0; fmin does the clipping in a single ufunc
+    # pass and, like the comparison it replaces, maps nan to 1.0
+    x = np.fmin(x, 1.0)
     return special.betainc(a, b, x)
 
 
@@ -5037,7 +5181,11 @@ def f_value_wilks_lambda(ER, EF, dfnum, dfden, a, b):
         ER = array([[ER]])
     if isinstance(EF, (int, float)):
         EF = array([[EF]])
-    lmbda = linalg.det(EF) / linalg.det(ER)
+    # Take the ratio of determinants in log space, so that large error
+    # matrices do not overflow the individual determinants.
+    sign_ef, logdet_ef = np.linalg.slogdet(EF)
+    sign_er, logdet_er = np.linalg.slogdet(ER)
+    lmbda = sign_ef * sign_er * np.exp(logdet_ef - logdet_er)
     if (a-1)**2 + (b-1)**2 == 5:
         q = 1
     else:
@@ -5105,8 +5253,9 @@ def f_value_multivariate(ER, EF, dfnum, dfden):
         ER = array([[ER]])
     if isinstance(EF, (int, float)):
         EF = array([[EF]])
-    n_um = (linalg.det(ER) - linalg.det(EF)) / float(dfnum)
-    d_en = linalg.det(EF) / float(dfden)
+    det_ef = linalg.det(EF)
+    n_um = (linalg.det(ER) - det_ef) / float(dfnum)
+    d_en = det_ef / float(dfden)
     return n_um / d_en
 
 
@@ -5142,6 +5291,14 @@ def _sum_of_squares(a, axis=0):
     `_sum_of_squares`).
     """
     a, axis = _chk_asarray(a, axis)
+    if a.dtype.kind in 'fc':
+        # an inner product avoids allocating the temporary `a*a`
+        if a.ndim == 1:
+            return np.dot(a, a)
+        elif a.ndim == 2 and axis in (0, -2):
+            return np.einsum('ij,ij->j', a, a)
+        elif a.ndim == 2 and axis in (1, -1):
+            return np.einsum('ij,ij->i', a, a)
     return np.sum(a*a, axis)
 
 
@@ -65,6 +65,14 @@ class TestTieCorrect(TestCase):
         expected = 1.0 - ((T1**3 - T1) + (T2**3 - T2)) / (N**3 - N)
         assert_equal(c, expected)
 
+    def test_overflow(self):
+        """Large samples must not overflow the sum of the cubed tie counts."""
+        ntie, k = 2000, 9
+        a = np.repeat(np.arange(k), ntie)
+        n = a.size  # ntie * k
+        out = tiecorrect(rankdata(a))
+        assert_equal(out, 1.0 - k * (ntie**3 - ntie) / float(n**3 - n))
+
 
 class TestRankData(TestCase):
 
@@ -1338,6 +1338,19 @@ class TestMode(TestCase):
         assert_equal(vals[0], np.array([[10], [10], [20], [30], [30]]))
         assert_equal(vals[1], np.array([[2], [4], [3], [4], [3]]))
 
+    def test_nan_propagate(self):
+        # nan is never counted; a slice of only nan gives (0, 0).
+        arr = np.array([[np.nan, 1.0, 2.0],
+                        [np.nan, np.nan, 2.0],
+                        [np.nan, 3.0, 2.0]])
+        vals = stats.mode(arr, axis=0)
+        assert_equal(vals[0], np.array([[0.0, 1.0, 2.0]]))
+        assert_equal(vals[1], np.array([[0, 1, 3]]))
+
+        vals = stats.mode([1.0, np.nan, 2.0, 2.0, np.nan, np.nan])
+        assert_equal(vals[0], np.array([2.0]))
+        assert_equal(vals[1], np.array([2]))
+
     def test_strings(self):
         data1 = ['rain', 'showers', 'showers']
         with warnings.catch_warnings():
@@ -1815,6 +1828,13 @@ def test_percentileofscore():
     assert_raises(ValueError, pcos, [1, 2, 3, 3, 4], 3, kind='unrecognized')
 
 
+def test_percentileofscore_rank_nan():
+    # An empty array or a nan score give nan rather than a rank.
+    pcos = stats.percentileofscore
+    assert_equal(pcos([], 1, kind='rank'), np.nan)
+    assert_equal(pcos([1, 2, 3], np.nan, kind='rank'), np.nan)
+
+
 PowerDivCase = namedtuple('Case', ['f_obs', 'f_exp', 'ddof', 'axis',
                                    'chi2',     # Pearson's
                                    'log',      # G-test (log-likelihood)
@@ -2445,6 +2465,23 @@ def test_ttest_ind():
         np.seterr(**olderr)
 
 
+def test_ttest_ind_complex():
+    # The variances of complex samples are real, as with np.var.
+    a = np.array([1 + 2j, 3 - 1j, 2 + 0.5j, 4 + 1j])
+    b = np.array([2 - 1j, 5 + 3j, 1 + 1j, 6 - 2j, 3 + 0.5j])
+    v1, v2 = np.var(a, ddof=1), np.var(b, ddof=1)
+    n1, n2 = len(a), len(b)
+    svar = ((n1 - 1) * v1 + (n2 - 1) * v2) / float(n1 + n2 - 2)
+    t_expected = (a.mean() - b.mean()) / np.sqrt(svar * (1.0/n1 + 1.0/n2))
+    t, p = stats.ttest_ind(a, b)
+    assert_allclose(t, t_expected, rtol=1e-12)
+    assert_allclose(p, 2 * stats.t.sf(np.abs(t_expected), n1 + n2 - 2),
+                    rtol=1e-12)
+
+    t, p = stats.ttest_1samp(a, 1.0)
+    assert_allclose(t, (a.mean() - 1.0) / np.sqrt(v1 / n1), rtol=1e-12)
+
+
 def test_ttest_ind_with_uneq_var():
     # check vs. R
     a = (1, 2, 3)
@@ -2981,6 +3018,27 @@ def test_obrientransform():
     assert_array_almost_equal(result[0], expected, decimal=4)
 
 
+def test_obrientransform_groups():
+    # Many small groups are transformed together; the result must match
+    # transforming each group on its own.
+    np.random.seed(1234)
+    groups = [np.random.rand(n) for n in np.random.randint(3, 8, size=20)]
+    result = stats.obrientransform(*groups)
+    for g, t in zip(groups, result):
+        assert_allclose(t, stats.obrientransform(g)[0], rtol=1e-12)
+
+    # Complex input is transformed as well: scaling the data by (1 + 1j)
+    # scales the transform by (1 + 1j)**2 = 2j.
+    x1 = np.array([0, 2, 4])
+    x2 = np.array([0, 3, 6, 9])
+    a, b = stats.obrientransform((1 + 1j)*x1, (1 + 1j)*x2)
+    assert_allclose(a, [14j, -4j, 14j])
+    assert_allclose(b, [60j, 0, 0, 60j], atol=1e-12)
+
+    # No arguments give an empty result.
+    assert_equal(stats.obrientransform().shape, (0,))
+
+
 class HarMeanTestCase:
     def test_1dlist(self):
         #  Test a 1d list
@@ -3444,6 +3502,17 @@ class TestFOneWay(TestCase):
         attributes = ('statistic', 'pvalue')
         check_named_results(res, attributes)
 
+    def test_2d_inputs(self):
+        # 2-D samples are tested column by column.
+        a = np.array([[1.0, 2.0], [3.0, 5.0], [2.0, 1.0]])
+        b = np.array([[4.0, 1.5], [6.0, 2.5]])
+        c = np.array([[0.5, 3.0], [1.0, 4.0], [2.5, 7.0], [3.5, 2.0]])
+        F, p = stats.f_oneway(a, b, c)
+        for j in range(2):
+            Fj, pj = stats.f_oneway(a[:, j], b[:, j], c[:, j])
+            assert_allclose(F[j], Fj, rtol=1e-12)
+            assert_allclose(p[j], pj, rtol=1e-12)
+
     def test_nist(self):
         # These are the nist ANOVA files. They can be found at:
         # http://www.itl.nist.gov/div898/strd/anova/anova.html